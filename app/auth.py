@@ -13,6 +13,13 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Emails of the users allowed to call the /admin endpoints; empty disables them
+ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -96,3 +103,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     return token_data
+
+
+async def get_admin_user(current_user: TokenData = Depends(get_current_user)):
+    """Retrieve the current user and require them to be an admin.
+
+    Args:
+        current_user (TokenData): The authenticated user.
+
+    Returns:
+        TokenData: The token data of the admin user.
+
+    Raises:
+        HTTPException: If the user's email is not listed in ADMIN_EMAILS.
+    """
+    if current_user.username.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
@@ -0,0 +1,21 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.profiler import SlowQueryProfiler
+from app.dataloader import DataLoader
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Slow-query profiler, attached to the shared MongoDB client below
+profiler = SlowQueryProfiler.from_env()
+
+# MongoDB connection shared by the app and its routers
+client = AsyncIOMotorClient(os.getenv("MONGODB_URI"), event_listeners=[profiler])
+db = client["candidate_management"]
+
+# Per-worker loader that coalesces concurrent candidate lookups by ID
+candidate_loader = DataLoader(
+    db["candidates"],
+    window=float(os.getenv("CANDIDATE_LOADER_WINDOW_MS", "2")) / 1000,
+    max_batch_size=int(os.getenv("CANDIDATE_LOADER_MAX_BATCH_SIZE", "100")),
+)
@@ -0,0 +1,116 @@
+import asyncio
+
+
+class DataLoader:
+    """Coalesce concurrent lookups by `_id` into batched `$in` queries.
+
+    Lookups for an ID that is already queued or in flight share its result
+    (single-flight). Distinct IDs requested within `window` seconds of each
+    other are fetched together with one `{"_id": {"$in": [...]}}` query.
+    Nothing is cached once a batch resolves, so every new lookup reads fresh
+    data. Pending state belongs to the running event loop and is dropped
+    when the loader is first used from a different one.
+
+    Attributes:
+        collection: The Motor collection to load documents from.
+        window (float): Seconds to wait for more IDs before querying.
+        max_batch_size (int): Number of IDs that triggers an immediate query.
+    """
+
+    def __init__(self, collection, window=0.002, max_batch_size=100):
+        self.collection = collection
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = {}
+        self._queue = []
+        self._timer = None
+        self._tasks = set()
+        self._loop = None
+
+    async def load(self, id):
+        """Load a document by ID.
+
+        Args:
+            id: The `_id` of the document.
+
+        Returns:
+            Optional[dict]: The document, or None if it does not exist.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures and the timer belong to a single loop, e.g. the previous
+            # test's loop; lookups left on a closed loop will never resolve
+            self._loop = loop
+            self._pending = {}
+            self._queue = []
+            self._timer = None
+            self._tasks = set()
+
+        future = self._pending.get(id)
+        if future is None:
+            future = loop.create_future()
+            self._pending[id] = future
+            self._queue.append((id, future))
+            if len(self._queue) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._dispatch)
+
+        # Shield the shared future so one cancelled caller does not fail the others
+        document = await asyncio.shield(future)
+        return dict(document) if document is not None else None
+
+    async def load_many(self, ids):
+        """Load several documents by ID.
+
+        Args:
+            ids (list): The `_id`s of the documents.
+
+        Returns:
+            list[Optional[dict]]: The documents in the order of `ids`, None where missing.
+        """
+        return await asyncio.gather(*(self.load(id) for id in ids))
+
+    def clear(self, id):
+        """Stop sharing an in-flight lookup with later callers.
+
+        Call after writing a document so that lookups made after the write
+        do not join a query that was sent before it.
+
+        Args:
+            id: The `_id` of the written document.
+        """
+        self._pending.pop(id, None)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._queue = self._queue, []
+        if batch:
+            task = asyncio.ensure_future(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch):
+        try:
+            ids = list(dict.fromkeys(id for id, _ in batch))
+            cursor = self.collection.find({"_id": {"$in": ids}})
+            documents = {document["_id"]: document async for document in cursor}
+        except Exception as e:
+            for id, future in self._settle(batch):
+                future.set_exception(e)
+            return
+
+        for id, future in self._settle(batch):
+            future.set_result(documents.get(id))
+
+    def _settle(self, batch):
+        """Yield the futures of a batch that still need a result."""
+        for id, future in batch:
+            # A cleared ID may already have a newer lookup pending
+            if self._pending.get(id) is future:
+                del self._pending[id]
+            if not future.done():
+                yield id, future
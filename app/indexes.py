@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+load_dotenv()
+
+# Declarative index registry, keyed by collection name.
+# The default `_id_` index is always present and is never declared here.
+INDEXES = {
+    "users": [
+        # Login and registration look users up by email
+        IndexModel([("email", ASCENDING)], name="user_email_unique", unique=True),
+    ],
+    "candidates": [
+        # Per-field indexes so each clause of the /all-candidates $or search can use an index
+        IndexModel([("name", ASCENDING)], name="candidate_name"),
+        IndexModel([("skills", ASCENDING)], name="candidate_skills"),
+        IndexModel([("experience", DESCENDING)], name="candidate_experience"),
+        # Covers the `_id` + `version` lookups that answer conditional requests
+        IndexModel(
+            [("_id", ASCENDING), ("version", ASCENDING)], name="candidate_version"
+        ),
+        IndexModel(
+            [("name", TEXT), ("experience", TEXT), ("skills", TEXT)],
+            name="CandidateTextIndex",
+        ),
+    ],
+    # Counters are only ever looked up by `_id`, which is indexed by default
+    "counters": [],
+}
+
+
+class DuplicateKeysError(Exception):
+    """Raised when a unique index cannot be built because of duplicate values.
+
+    Attributes:
+        duplicates (dict): Duplicated key values per `collection.index` name.
+    """
+
+    def __init__(self, duplicates):
+        self.duplicates = duplicates
+        lines = [
+            f"  {index}: {', '.join(str(value) for value in values)}"
+            for index, values in duplicates.items()
+        ]
+        super().__init__(
+            "Unique indexes were not built because of duplicate values:\n"
+            + "\n".join(lines)
+        )
+
+
+async def find_duplicates(collection, index, limit=20):
+    """Find key values that would violate a unique index.
+
+    Args:
+        collection: The Motor collection to check.
+        index (IndexModel): The unique index to check for.
+        limit (int, optional): Maximum number of duplicated values to return.
+
+    Returns:
+        list[dict]: The duplicated key values.
+    """
+    fields = list(index.document["key"])
+    cursor = collection.aggregate(
+        [
+            {
+                "$group": {
+                    "_id": {field: f"${field}" for field in fields},
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": limit},
+        ]
+    )
+    return [group["_id"] async for group in cursor]
+
+
+async def sync_indexes(db, prune: bool = False):
+    """Create every index declared in the registry.
+
+    Creating an index that already exists with the same specification is a
+    no-op in MongoDB, so this is safe to run on every startup. A unique index
+    that does not exist yet is only built if the collection has no duplicate
+    values for it; otherwise it is skipped and reported once every other
+    index has been synced.
+
+    Args:
+        db: The Motor database to sync.
+        prune (bool, optional): Also drop indexes that are not in the registry.
+
+    Returns:
+        dict: The ensured and dropped index names per collection.
+
+    Raises:
+        DuplicateKeysError: If a unique index was skipped because of duplicate values.
+    """
+    summary = {}
+    duplicates = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+
+        buildable = []
+        for index in indexes:
+            name = index.document["name"]
+            if index.document.get("unique") and name not in existing:
+                values = await find_duplicates(collection, index)
+                if values:
+                    duplicates[f"{collection_name}.{name}"] = values
+                    continue
+            buildable.append(index)
+
+        ensured = []
+        if buildable:
+            ensured = await collection.create_indexes(buildable)
+
+        dropped = []
+        if prune:
+            declared = {index.document["name"] for index in indexes}
+            for name in existing:
+                if name != "_id_" and name not in declared:
+                    await collection.drop_index(name)
+                    dropped.append(name)
+
+        summary[collection_name] = {"ensured": ensured, "dropped": dropped}
+
+    if duplicates:
+        raise DuplicateKeysError(duplicates)
+    return summary
+
+
+async def main(prune: bool = False):
+    """Sync the index registry against the configured MongoDB database.
+
+    Args:
+        prune (bool, optional): Also drop indexes that are not in the registry.
+    """
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    try:
+        summary = await sync_indexes(client["candidate_management"], prune=prune)
+    except DuplicateKeysError as e:
+        raise SystemExit(str(e))
+    finally:
+        client.close()
+
+    for collection_name, result in summary.items():
+        print(
+            f"{collection_name}: ensured {result['ensured'] or 'none'}, "
+            f"dropped {result['dropped'] or 'none'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync MongoDB indexes.")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="drop indexes that are not declared in the registry",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(prune=args.prune))
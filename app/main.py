@@ -1,20 +1,36 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.routers import user, candidate
-import os
+from app.database import db
+from app.routers import user, candidate, admin
+from app.indexes import DuplicateKeysError, sync_indexes
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-# MongoDB connection
-client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
-db = client["candidate_management"]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Sync the declared MongoDB indexes before serving requests.
+
+    Duplicate values only block their own unique index, so the app still
+    boots and the duplicates are logged for cleanup.
+    """
+    try:
+        await sync_indexes(db)
+    except DuplicateKeysError as e:
+        logger.error("%s\nRemove the duplicates and run `python -m app.indexes`.", e)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Include routers
 app.include_router(user.router)
 app.include_router(candidate.router)
+app.include_router(admin.router)
 
 
 @app.get("/health")
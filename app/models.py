@@ -34,12 +34,10 @@ class UserModel(BaseModel):
     """Data model for user information.
 
     Attributes:
-        id (Optional[int]): The user ID.
         username (str): The username of the user.
         email (EmailStr): The email of the user.
         password (str): The password of the user.
     """
-    id: Optional[int] = Field(default=None, alias="_id")
     username: str
     email: EmailStr
     password: str
@@ -58,11 +56,13 @@ class CandidateModel(BaseModel):
         name (str): The name of the candidate.
         experience (int): The experience of the candidate in years.
         skills (list[str]): The skills of the candidate.
+        version (Optional[int]): Incremented on every write, used for ETags.
     """
     id: Optional[int] = Field(default=None, alias="_id")
     name: str
     experience: int
     skills: list[str]
+    version: Optional[int] = None
 
     class Config:
         """Pydantic configuration for CandidateModel."""
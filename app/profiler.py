@@ -0,0 +1,394 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+from pymongo import MongoClient, monitoring
+
+# Commands whose filters we record and that MongoDB can explain
+PROFILED_COMMANDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+    "update": "updates",
+    "delete": "deletes",
+}
+
+# Driver-added fields that must be stripped before re-running a command as explain
+DRIVER_FIELDS = {
+    "lsid",
+    "$db",
+    "$clusterTime",
+    "$readPreference",
+    "txnNumber",
+    "autocommit",
+    "startTransaction",
+    "readConcern",
+    "writeConcern",
+}
+
+# Commands that open a cursor whose later batches are fetched with getMore
+CURSOR_COMMANDS = {"find", "aggregate"}
+
+# Open cursors tracked at once; the oldest is recorded and dropped beyond this
+MAX_OPEN_CURSORS = 1000
+
+# Plan fields of a query whose shape has not been explained (yet)
+UNEXPLAINED = {"explained": False, "collscan": False, "plan": None}
+
+
+def redact(value):
+    """Replace every literal in a query with a placeholder, keeping its shape.
+
+    Args:
+        value: A filter, pipeline or any part of one.
+
+    Returns:
+        The same structure with keys and operators kept and values replaced by "?".
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [redact(item) for item in value]
+        # Lists of literals (e.g. $in) collapse so their length does not change the shape
+        return ["?"]
+    return "?"
+
+
+def has_collection_scan(plan):
+    """Check whether an explain output contains a COLLSCAN stage in a winning plan.
+
+    Args:
+        plan (dict): The output of an explain command.
+
+    Returns:
+        bool: True if any winning plan scans the whole collection.
+    """
+
+    def scans(node):
+        if isinstance(node, dict):
+            if node.get("stage") == "COLLSCAN":
+                return True
+            return any(scans(item) for item in node.values())
+        if isinstance(node, list):
+            return any(scans(item) for item in node)
+        return False
+
+    def winning_plans(node):
+        if isinstance(node, dict):
+            for key, item in node.items():
+                if key == "winningPlan":
+                    yield item
+                else:
+                    yield from winning_plans(item)
+        elif isinstance(node, list):
+            for item in node:
+                yield from winning_plans(item)
+
+    return any(scans(winning_plan) for winning_plan in winning_plans(plan))
+
+
+def summarize_plan(node):
+    """Reduce a winning plan to its stages and index names.
+
+    Plans embed the query's literal values in their filters and index bounds,
+    so only the tree of stages is kept.
+
+    Args:
+        node (dict): A winning plan or one of its stages.
+
+    Returns:
+        dict: The stage name, index name if any, and summarized input stages.
+    """
+    if "queryPlan" in node:
+        # Slot-based execution engine plans wrap the classic plan tree
+        return summarize_plan(node["queryPlan"])
+
+    summary = {"stage": node.get("stage")}
+    if "indexName" in node:
+        summary["indexName"] = node["indexName"]
+    if "inputStage" in node:
+        summary["inputStages"] = [summarize_plan(node["inputStage"])]
+    elif "inputStages" in node:
+        summary["inputStages"] = [
+            summarize_plan(stage) for stage in node["inputStages"]
+        ]
+    return summary
+
+
+class SlowQueryProfiler(monitoring.CommandListener):
+    """Pymongo command listener that records slow queries and their plans.
+
+    Queries slower than the threshold are recorded with their redacted filter
+    shape. The duration of a `find` or `aggregate` includes the `getMore`
+    batches of its cursor, so a query that streams a large result is
+    recorded once its cursor is exhausted or killed.
+
+    A sample of the shapes is explained once each, on a background thread
+    with a separate client, so queries never wait for an explain. Plans that
+    use a collection scan are flagged.
+
+    Attributes:
+        threshold_ms (float): Minimum duration for a query to be recorded.
+        explain_rate (float): Chance that a shape not explained yet gets explained.
+        entries (deque): The most recent recorded queries, with their shape key.
+    """
+
+    def __init__(self, uri=None, threshold_ms=100.0, explain_rate=0.1, max_entries=500):
+        self.uri = uri
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.entries = deque(maxlen=max_entries)
+        self._started = {}
+        self._cursors = {}
+        self._plans = {}
+        self._queued = set()
+        self._generation = 0
+        self._explain_queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._explain_client = None
+
+    @classmethod
+    def from_env(cls):
+        """Build a profiler configured from environment variables.
+
+        Returns:
+            SlowQueryProfiler: The configured profiler.
+        """
+        return cls(
+            uri=os.getenv("MONGODB_URI"),
+            threshold_ms=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100")),
+            explain_rate=float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1")),
+            max_entries=int(os.getenv("SLOW_QUERY_MAX_ENTRIES", "500")),
+        )
+
+    def started(self, event):
+        if event.command_name == "killCursors":
+            # An abandoned cursor will not see more batches, so record it now
+            with self._lock:
+                queries = [
+                    self._cursors.pop((event.connection_id, cursor_id), None)
+                    for cursor_id in event.command.get("cursors", [])
+                ]
+            for query in queries:
+                if query is not None:
+                    self._record(query)
+            return
+        if (
+            event.command_name not in PROFILED_COMMANDS
+            and event.command_name != "getMore"
+        ):
+            return
+        # The succeeded event does not carry the command, so keep it until then.
+        # Request IDs are only unique per connection.
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (
+                event.database_name,
+                event.command,
+            )
+
+    def succeeded(self, event):
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+
+        database_name, command = started
+        duration_ms = event.duration_micros / 1000
+        cursor_id = (event.reply or {}).get("cursor", {}).get("id", 0)
+
+        if event.command_name == "getMore":
+            # Cursor IDs are unique per server, and connection_id is the server address
+            cursor_key = (event.connection_id, command["getMore"])
+            with self._lock:
+                query = self._cursors.pop(cursor_key, None)
+                if query is not None:
+                    query["duration_ms"] += duration_ms
+                    query["batches"] += 1
+                    if cursor_id:
+                        self._cursors[cursor_key] = query
+            if query is not None and not cursor_id:
+                self._record(query)
+            return
+
+        query = {
+            "database_name": database_name,
+            "command_name": event.command_name,
+            "command": command,
+            "duration_ms": duration_ms,
+            "batches": 1,
+        }
+        if event.command_name in CURSOR_COMMANDS and cursor_id:
+            # Wait for the remaining batches before deciding whether it was slow
+            with self._lock:
+                self._cursors[(event.connection_id, cursor_id)] = query
+                evicted = []
+                while len(self._cursors) > MAX_OPEN_CURSORS:
+                    evicted.append(self._cursors.pop(next(iter(self._cursors))))
+            for query in evicted:
+                self._record(query)
+            return
+        self._record(query)
+
+    def failed(self, event):
+        with self._lock:
+            self._started.pop((event.connection_id, event.request_id), None)
+
+    def _record(self, query):
+        if query["duration_ms"] < self.threshold_ms:
+            return
+
+        command_name, command = query["command_name"], query["command"]
+        entry = {
+            "timestamp": time.time(),
+            "command": command_name,
+            "collection": command.get(command_name),
+            "shape": self._shape(command_name, command),
+            "sort": dict(command.get("sort") or {}),
+            "duration_ms": round(query["duration_ms"], 3),
+            "batches": query["batches"],
+        }
+        key = repr(
+            (entry["command"], entry["collection"], entry["shape"], entry["sort"])
+        )
+
+        with self._lock:
+            self.entries.append((key, entry))
+            explain = (
+                key not in self._plans
+                and key not in self._queued
+                and random.random() < self.explain_rate
+            )
+            if explain:
+                self._queued.add(key)
+                generation = self._generation
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="slow-query-explain", daemon=True
+                    )
+                    self._worker.start()
+        if explain:
+            self._explain_queue.put((generation, key, query["database_name"], command))
+
+    def _shape(self, command_name, command):
+        value = command.get(PROFILED_COMMANDS[command_name])
+        if command_name in ("update", "delete"):
+            # Bulk write commands carry one filter per statement
+            value = [statement.get("q") for statement in value or []]
+        return redact(value or {})
+
+    def _run(self):
+        while True:
+            generation, key, database_name, command = self._explain_queue.get()
+            try:
+                result = self._explain(database_name, command)
+                with self._lock:
+                    # Drop plans of explains queued before the last reset()
+                    if generation == self._generation:
+                        self._plans[key] = result
+                        self._queued.discard(key)
+            finally:
+                self._explain_queue.task_done()
+
+    def _explain(self, database_name, command):
+        explained = {
+            key: value for key, value in command.items() if key not in DRIVER_FIELDS
+        }
+        try:
+            if self._explain_client is None:
+                # A separate client, so explains are not profiled themselves
+                self._explain_client = MongoClient(self.uri)
+            plan = self._explain_client[database_name].command(
+                {"explain": explained, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            return {**UNEXPLAINED, "plan": {"error": str(e)}}
+
+        winning_plan = plan.get("queryPlanner", {}).get("winningPlan")
+        return {
+            "explained": True,
+            "collscan": has_collection_scan(plan),
+            "plan": summarize_plan(winning_plan) if winning_plan is not None else None,
+        }
+
+    def wait(self):
+        """Block until every queued explain has finished."""
+        self._explain_queue.join()
+
+    def report(self):
+        """Return a snapshot of the recorded queries.
+
+        Returns:
+            list[dict]: The recorded queries, oldest first, with the plan of their shape.
+        """
+        with self._lock:
+            return [
+                {**entry, **self._plans.get(key, UNEXPLAINED)}
+                for key, entry in self.entries
+            ]
+
+    def collection_scans(self, collection=None):
+        """Return the recorded queries whose plan was a collection scan.
+
+        Args:
+            collection (str, optional): Only return scans of this collection.
+
+        Returns:
+            list[dict]: The recorded collection scans.
+        """
+        return [
+            entry
+            for entry in self.report()
+            if entry["collscan"] and collection in (None, entry["collection"])
+        ]
+
+    def reset(self):
+        """Forget all recorded queries, open cursors and explained plans.
+
+        Explains that are still queued are dropped, and one already running
+        does not store its plan.
+        """
+        with self._lock:
+            self._generation += 1
+            self.entries.clear()
+            self._cursors.clear()
+            self._plans.clear()
+            self._queued.clear()
+            while True:
+                try:
+                    self._explain_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._explain_queue.task_done()
+
+
+def assert_no_collection_scans(profiler, collection=None):
+    """Fail if the profiler recorded any collection scan.
+
+    Meant for tests: run the profiler with a zero threshold and a full explain
+    rate, exercise a handler, then call this helper. It waits for queued
+    explains to finish first.
+
+    Args:
+        profiler (SlowQueryProfiler): The profiler to check.
+        collection (str, optional): Only check scans of this collection.
+
+    Raises:
+        AssertionError: If a collection scan was recorded.
+    """
+    profiler.wait()
+    scans = profiler.collection_scans(collection)
+    if scans:
+        shapes = "\n".join(
+            dict.fromkeys(
+                f"  {entry['command']} {entry['collection']}: {entry['shape']}"
+                for entry in scans
+            )
+        )
+        raise AssertionError(f"Collection scans detected:\n{shapes}")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from app.auth import get_admin_user
+from app.database import profiler
+
+router = APIRouter()
+
+
+@router.get("/admin/slow-queries")
+async def get_slow_queries(
+    collscan_only: bool = False, current_user: dict = Depends(get_admin_user)
+):
+    """Retrieve the slow queries recorded by the profiler.
+
+    Args:
+        collscan_only (bool, optional): Only return queries that scanned a whole collection.
+
+    Returns:
+        dict: The profiler settings and the recorded queries, oldest first.
+    """
+    queries = profiler.collection_scans() if collscan_only else profiler.report()
+    return {
+        "threshold_ms": profiler.threshold_ms,
+        "explain_rate": profiler.explain_rate,
+        "queries": queries,
+    }
+
+
+@router.delete("/admin/slow-queries", response_model=dict)
+async def reset_slow_queries(current_user: dict = Depends(get_admin_user)):
+    """Clear the slow queries recorded by the profiler.
+
+    Returns:
+        dict: Message indicating the queries were cleared.
+    """
+    profiler.reset()
+    return {"message": "Slow queries cleared"}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
 from app.models import CandidateModel
 from app.auth import get_current_user
-from motor.motor_asyncio import AsyncIOMotorClient
+from app.database import db, candidate_loader
+from app.utils import etag_matches
 from bson import ObjectId, errors
-import os
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from typing import Optional
+import hashlib
 
 from fastapi.responses import StreamingResponse
 import io
@@ -11,13 +15,68 @@ import csv
 
 router = APIRouter()
 
-client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
-db = client["candidate_management"]
+# Only the fields needed to build ETags, covered by the `candidate_version` index
+VERSION_PROJECTION = {"_id": 1, "version": 1}
+
+# Maximum number of IDs accepted by the batch lookup endpoint
+MAX_BATCH_IDS = 100
+
+
+def candidate_etag(candidate: dict) -> str:
+    """Build the ETag of a candidate from its ID and version.
+
+    Args:
+        candidate (dict): The candidate document, or just its `_id` and `version`.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    # Candidates written before versioning was introduced have no version
+    return f'"{candidate["_id"]}-{candidate.get("version") or 0}"'
+
+
+def candidate_list_etag(candidates: list) -> str:
+    """Build the ETag of a page of candidates from their IDs and versions.
+
+    Args:
+        candidates (list[dict]): The candidate documents, or just their `_id` and `version`.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    digest = hashlib.sha1()
+    for candidate in candidates:
+        digest.update(candidate_etag(candidate).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def expected_version(if_match: str, id: int):
+    """Extract the candidate version a client expects from an If-Match header.
+
+    Args:
+        if_match (str): The If-Match header value.
+        id (int): The ID of the candidate being updated.
+
+    Returns:
+        Optional[int]: The expected version, or None if the header is "*".
+
+    Raises:
+        HTTPException: If the header does not name a version of this candidate.
+    """
+    for tag in (tag.strip() for tag in if_match.split(",")):
+        if tag == "*":
+            return None
+        candidate_id, _, version = tag.strip('"').rpartition("-")
+        if candidate_id == str(id) and version.isdigit():
+            return int(version)
+    raise HTTPException(status_code=412, detail="Candidate has been modified")
 
 
 @router.post("/candidates", response_model=CandidateModel)
 async def create_candidate(
-    candidate: CandidateModel, current_user: dict = Depends(get_current_user)
+    candidate: CandidateModel,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
 ):
     """Create a new candidate.
     
@@ -39,40 +98,106 @@ async def create_candidate(
 
     candidate_data = candidate.model_dump()
     candidate_data["_id"] = candidate_id  # Set the auto-incremented id
+    candidate_data["version"] = 1
 
     await db["candidates"].insert_one(candidate_data)
+    response.headers["ETag"] = candidate_etag(candidate_data)
     return candidate_data
 
 
 @router.get("/candidates/{id}", response_model=CandidateModel)
-async def get_candidate(id: int, current_user: dict = Depends(get_current_user)):
+async def get_candidate(
+    id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
     """Retrieve a candidate by ID.
 
+    When If-None-Match lists the current ETag, a 304 is returned from an
+    index-only version lookup without fetching the candidate.
+
     Args:
         id (int): The ID of the candidate to retrieve.
+        if_none_match (str, optional): ETags the client already has.
 
     Returns:
         Candidate: The retrieved candidate.
     """
-    candidate = await db["candidates"].find_one({"_id": id})
+    if if_none_match:
+        try:
+            current = await db["candidates"].find_one(
+                {"_id": id}, VERSION_PROJECTION, hint="candidate_version"
+            )
+        except OperationFailure:
+            # The index is missing, e.g. before the registry was synced
+            current = await db["candidates"].find_one({"_id": id}, VERSION_PROJECTION)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+        etag = candidate_etag(current)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    candidate = await candidate_loader.load(id)
     if candidate is None:
         raise HTTPException(status_code=404, detail="Candidate not found")
+    response.headers["ETag"] = candidate_etag(candidate)
     return candidate
 
 
+@router.get("/candidates", response_model=list[CandidateModel])
+async def get_candidates(
+    ids: str = Query(..., description="Comma-separated candidate IDs"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Retrieve several candidates by ID.
+
+    Lookups go through the candidate loader, so they are merged with any
+    concurrent requests for the same IDs.
+
+    Args:
+        ids (str): Comma-separated IDs of the candidates to retrieve.
+
+    Returns:
+        List[Candidate]: The candidates that exist, in the order requested.
+
+    Raises:
+        HTTPException: If the IDs are not integers or there are too many of them.
+    """
+    try:
+        candidate_ids = [int(id) for id in ids.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Candidate IDs must be integers")
+    if len(candidate_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_IDS} candidate IDs are allowed"
+        )
+
+    # Drop repeated IDs but keep the requested order
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    candidates = await candidate_loader.load_many(candidate_ids)
+    return [candidate for candidate in candidates if candidate is not None]
+
+
 @router.get("/all-candidates")
 async def get_all_candidates(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     search: str = "",
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
 ):
     """Retrieve all candidates with optional search and pagination.
 
+    The ETag is derived from the IDs and versions of the page, so a 304 can
+    be answered by fetching only those two fields.
+
     Args:
         search (str, optional): Search term for filtering candidates.
         skip (int, optional): Number of records to skip for pagination.
         limit (int, optional): Maximum number of records to return.
+        if_none_match (str, optional): ETags the client already has.
 
     Returns:
         List[Candidate]: List of candidates.
@@ -90,8 +215,24 @@ async def get_all_candidates(
                 ]
             }
 
-        candidates_cursor = db["candidates"].find(query).skip(skip).limit(limit)
+        if if_none_match:
+            versions_cursor = (
+                db["candidates"]
+                .find(query, VERSION_PROJECTION)
+                .sort("_id", 1)
+                .skip(skip)
+                .limit(limit)
+            )
+            etag = candidate_list_etag(await versions_cursor.to_list(length=limit))
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+        # Sort on the _id index so pages are stable and never need a collection scan
+        candidates_cursor = (
+            db["candidates"].find(query).sort("_id", 1).skip(skip).limit(limit)
+        )
         candidates = await candidates_cursor.to_list(length=limit)
+        response.headers["ETag"] = candidate_list_etag(candidates)
 
         # Return an empty list if no candidates are found
         return candidates
@@ -102,24 +243,51 @@ async def get_all_candidates(
 
 @router.put("/candidates/{id}", response_model=CandidateModel)
 async def update_candidate(
-    id: int, candidate: CandidateModel, current_user: dict = Depends(get_current_user)
+    id: int,
+    candidate: CandidateModel,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
 ):
     """Update an existing candidate.
 
+    When If-Match is given, the update only applies if the candidate exists
+    and, unless the header is "*", is still at the version named by the ETag.
+
     Args:
         id (str): The ID of the candidate to update.
         candidate (Candidate): The updated candidate data.
+        if_match (str, optional): The ETag the client last saw.
 
     Returns:
         Candidate: The updated candidate.
+
+    Raises:
+        HTTPException: 404 if the candidate does not exist, or 412 if If-Match does not match.
     """
-    candidate_data = candidate.dict(exclude_unset=True)
-    result = await db["candidates"].update_one({"_id": id}, {"$set": candidate_data})
+    candidate_data = candidate.model_dump(exclude_unset=True, exclude={"id", "version"})
+
+    query = {"_id": id}
+    if if_match:
+        version = expected_version(if_match, id)
+        if version is not None:
+            # Version 0 stands for candidates written before versioning
+            query["version"] = version or None
+
+    updated_candidate = await db["candidates"].find_one_and_update(
+        query,
+        {"$set": candidate_data, "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
 
-    if result.matched_count == 0:
+    candidate_loader.clear(id)
+    if updated_candidate is None:
+        # If-Match fails on a missing candidate too, even for "*" (RFC 9110)
+        if if_match:
+            raise HTTPException(status_code=412, detail="Candidate has been modified")
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    updated_candidate = await db["candidates"].find_one({"_id": id})
+    response.headers["ETag"] = candidate_etag(updated_candidate)
     return updated_candidate
 
 
@@ -134,6 +302,7 @@ async def delete_candidate(id: int, current_user: dict = Depends(get_current_use
         None
     """
     result = await db["candidates"].delete_one({"_id": id})
+    candidate_loader.clear(id)
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Candidate not found")
@@ -3,21 +3,36 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.models import UserModel
 from app.auth import get_password_hash, verify_password, create_access_token
 from app.utils import validate_password
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from app.database import db
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter()
 
-client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
-db = client["candidate_management"]
+# Set once the unique email index is known to exist. Until then, e.g. when
+# existing duplicate emails stopped it from being built, create_user checks
+# for duplicates itself.
+email_index_ready = False
+
+
+async def check_email_index():
+    """Check whether the unique email index exists, caching a positive answer.
+
+    Returns:
+        bool: True if `user_email_unique` exists on the users collection.
+    """
+    global email_index_ready
+    if not email_index_ready:
+        email_index_ready = "user_email_unique" in await db["users"].index_information()
+    return email_index_ready
 
 
 @router.post("/user")
 async def create_user(user: UserModel):
     """Create a new user.
 
-    Validates the password complexity and checks for existing users
-    before creating a new user in the database.
+    Validates the password complexity before creating a new user in the
+    database. Duplicate emails are rejected by the unique index on `email`,
+    or by an explicit lookup while that index does not exist.
 
     Args:
         user (UserModel): The user data to be created.
@@ -32,25 +47,20 @@ async def create_user(user: UserModel):
             detail="Password must be at least 8 characters long and include numbers and special characters",
         )
 
-    # Increment the user id
-    counter = await db["counters"].find_one_and_update(
-        {"_id": "user_id"},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=True,
-    )
-    user_id = counter["sequence_value"]
-
-    existing_user = await db["users"].find_one({"email": user.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    if not await check_email_index():
+        existing_user = await db["users"].find_one({"email": user.email})
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
 
     hashed_password = get_password_hash(user.password)
+    # MongoDB assigns the ObjectId `_id` on insert
     user_data = user.model_dump()
     user_data["password"] = hashed_password
-    user_data["_id"] = user_id  # Set the auto-incremented id
 
-    await db["users"].insert_one(user_data)
+    try:
+        await db["users"].insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User created successfully"}
 
 
@@ -20,6 +20,23 @@ def validate_password(password: str) -> bool:
         return False
     return True
 
+def etag_matches(header: str, etag: str) -> bool:
+    """Check whether an If-None-Match header matches an ETag.
+
+    Uses the weak comparison required for If-None-Match, so "W/" prefixes
+    are ignored.
+
+    Args:
+        header (str): The header value, a comma-separated list of ETags or "*".
+        etag (str): The current quoted ETag of the resource.
+
+    Returns:
+        bool: True if the header is "*" or lists the ETag.
+    """
+    tags = [tag.strip() for tag in header.split(",")]
+    tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+    return "*" in tags or etag in tags
+
 def generate_random_email():
     """Generate a random email address.
 
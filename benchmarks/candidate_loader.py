@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.dataloader import DataLoader
+
+load_dotenv()
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Count the `find` commands sent to MongoDB."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name == "find":
+            with self._lock:
+                self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def find_one_per_id(collection, ids):
+    """Baseline lookup: one `find_one` per ID, as before the loader."""
+    return [await collection.find_one({"_id": id}) for id in ids]
+
+
+async def find_in_per_request(collection, ids):
+    """Baseline batch lookup: one `$in` query per request, without coalescing."""
+    return await collection.find({"_id": {"$in": ids}}).to_list(length=None)
+
+
+async def run(name, lookup, requests, counter):
+    """Run all requests concurrently and report DB operations per request.
+
+    Returns:
+        float: The DB operations per request.
+    """
+    counter.count = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(lookup(ids) for ids in requests))
+    elapsed = time.perf_counter() - start
+    ops_per_request = counter.count / len(requests)
+    print(
+        f"{name:<28} {len(requests):>8} {counter.count:>8} "
+        f"{ops_per_request:>8.3f} {elapsed * 1000:>10.1f}"
+    )
+    return ops_per_request
+
+
+async def main(candidates, requests, batch_size, window_ms):
+    """Compare candidate lookups with and without the loader.
+
+    Single lookups model concurrent `GET /candidates/{id}` calls and batches
+    model `GET /candidates?ids=` calls, both drawing from the same small
+    pool of IDs so that requests overlap. Each is compared with its
+    uncoalesced baseline: one `find_one` per single lookup, and one `$in`
+    query per batch request.
+    """
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"), event_listeners=[counter])
+    db = client["candidate_management_benchmark"]
+    collection = db["candidates"]
+    try:
+        await collection.drop()
+        await collection.insert_many(
+            [
+                {
+                    "_id": id,
+                    "name": f"Candidate {id}",
+                    "experience": 1,
+                    "skills": [],
+                    "version": 1,
+                }
+                for id in range(1, candidates + 1)
+            ]
+        )
+
+        pool = range(1, candidates + 1)
+        singles = [[random.choice(pool)] for _ in range(requests)]
+        batches = [random.sample(pool, batch_size) for _ in range(requests)]
+        loader = DataLoader(collection, window=window_ms / 1000)
+
+        print(
+            f"{'scenario':<28} {'requests':>8} {'db ops':>8} {'ops/req':>8} {'ms':>10}"
+        )
+        single_baseline = await run(
+            "single, find_one",
+            lambda ids: find_one_per_id(collection, ids),
+            singles,
+            counter,
+        )
+        single_loader = await run("single, loader", loader.load_many, singles, counter)
+        batch_baseline = await run(
+            "batch, $in per request",
+            lambda ids: find_in_per_request(collection, ids),
+            batches,
+            counter,
+        )
+        batch_loader = await run("batch, loader", loader.load_many, batches, counter)
+
+        print()
+        print(
+            f"single: loader {single_loader:.3f} vs find_one {single_baseline:.3f} ops/request"
+        )
+        print(
+            f"batch: loader {batch_loader:.3f} vs $in per request {batch_baseline:.3f} ops/request"
+        )
+    finally:
+        await client.drop_database("candidate_management_benchmark")
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the candidate loader.")
+    parser.add_argument(
+        "--candidates", type=int, default=50, help="size of the ID pool"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="concurrent requests"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10, help="IDs per batch request"
+    )
+    parser.add_argument(
+        "--window-ms", type=float, default=2, help="loader batching window"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.candidates, args.requests, args.batch_size, args.window_ms))
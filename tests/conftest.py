@@ -0,0 +1,21 @@
+import asyncio
+import os
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.indexes import sync_indexes
+
+
+@pytest.fixture(scope="session")
+def mongo_indexes():
+    """Sync the index registry once, since `AsyncClient(app=app)` skips the startup hook."""
+
+    async def sync():
+        client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+        try:
+            await sync_indexes(client["candidate_management"])
+        finally:
+            client.close()
+
+    asyncio.run(sync())
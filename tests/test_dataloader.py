@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+
+from app.dataloader import DataLoader
+
+
+class StubCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def __aiter__(self):
+        # Yield control so concurrent lookups can join the in-flight query
+        await asyncio.sleep(0.01)
+        for document in self.documents:
+            yield document
+
+
+class StubCollection:
+    """Collection stub that records every `find` filter it receives."""
+
+    def __init__(self, ids):
+        self.documents = {id: {"_id": id, "version": 1} for id in ids}
+        self.finds = []
+
+    def find(self, query):
+        self.finds.append(query)
+        ids = query["_id"]["$in"]
+        return StubCursor(
+            [dict(self.documents[id]) for id in ids if id in self.documents]
+        )
+
+
+@pytest.mark.asyncio
+async def test_identical_lookups_share_one_query():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection)
+
+    candidates = await asyncio.gather(*(loader.load(1) for _ in range(50)))
+
+    assert collection.finds == [{"_id": {"$in": [1]}}]
+    assert all(candidate == {"_id": 1, "version": 1} for candidate in candidates)
+
+
+@pytest.mark.asyncio
+async def test_distinct_lookups_are_batched():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection)
+
+    candidates = await asyncio.gather(
+        loader.load(3), loader.load(1), loader.load_many([2, 3, 42])
+    )
+
+    assert collection.finds == [{"_id": {"$in": [3, 1, 2, 42]}}]
+    assert candidates[0]["_id"] == 3
+    assert candidates[1]["_id"] == 1
+    assert [candidate and candidate["_id"] for candidate in candidates[2]] == [
+        2,
+        3,
+        None,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_lookups_join_in_flight_query():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection)
+
+    first = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0.005)  # The first query has been sent but not answered
+    second = await loader.load(1)
+
+    assert (await first)["_id"] == second["_id"] == 1
+    assert len(collection.finds) == 1
+
+
+@pytest.mark.asyncio
+async def test_clear_makes_later_lookups_fresh():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection)
+
+    first = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0.005)  # The first query has been sent but not answered
+    collection.documents[1]["version"] = 2
+    loader.clear(1)
+    second = await loader.load(1)
+
+    assert len(collection.finds) == 2
+    assert (await first)["_id"] == 1
+    assert second["version"] == 2
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size_dispatches_immediately():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection, window=60, max_batch_size=2)
+
+    candidates = await asyncio.wait_for(loader.load_many([1, 2]), timeout=1)
+
+    assert [candidate["_id"] for candidate in candidates] == [1, 2]
+    assert collection.finds == [{"_id": {"$in": [1, 2]}}]
+
+
+def test_loader_recovers_from_closed_loop():
+    collection = StubCollection(range(10))
+    loader = DataLoader(collection, window=0.01)
+
+    async def abandon():
+        asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+
+    # The loop closes while the lookup is still waiting for its window
+    asyncio.run(abandon())
+
+    async def load():
+        return await asyncio.wait_for(loader.load(1), timeout=1)
+
+    assert asyncio.run(load())["_id"] == 1
+    assert collection.finds == [{"_id": {"$in": [1]}}]
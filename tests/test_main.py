@@ -6,6 +6,10 @@ import warnings
 from unittest.mock import patch, AsyncMock
 from httpx import AsyncClient
 from app.main import app
+from app.database import db, profiler
+from app.indexes import sync_indexes
+from app.routers import user as user_router
+from app.profiler import assert_no_collection_scans
 from app.utils import (
     generate_random_email,
     generate_random_password,
@@ -18,10 +22,13 @@ from app.utils import (
 # Suppress specific deprecation warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="passlib.utils")
 
+# These tests rely on the registry indexes, e.g. the unique email index
+pytestmark = pytest.mark.usefixtures("mongo_indexes")
+
 
 @pytest.mark.asyncio
-async def get_access_token(async_client):
-    email = generate_random_email()
+async def get_access_token(async_client, email=None):
+    email = email or generate_random_email()
     password = generate_random_password()
     response = await async_client.post(
         "/user",
@@ -62,6 +69,43 @@ async def test_create_user():
     assert response.status_code == 200
     assert response.json() == {"message": "User created successfully"}
 
+@pytest.mark.asyncio
+async def test_create_user_duplicate_email():
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        email = generate_random_email()
+        payload = {
+            "username": generate_random_username(),
+            "email": email,
+            "password": generate_random_password(),
+        }
+        response = await async_client.post("/user", json=payload)
+        assert response.status_code == 200
+
+        response = await async_client.post("/user", json=payload)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Email already registered"}
+
+@pytest.mark.asyncio
+async def test_create_user_duplicate_email_without_index():
+    # Simulate existing duplicates having stopped the unique index from being built
+    await db["users"].drop_index("user_email_unique")
+    user_router.email_index_ready = False
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as async_client:
+            payload = {
+                "username": generate_random_username(),
+                "email": generate_random_email(),
+                "password": generate_random_password(),
+            }
+            response = await async_client.post("/user", json=payload)
+            assert response.status_code == 200
+
+            response = await async_client.post("/user", json=payload)
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Email already registered"}
+    finally:
+        await sync_indexes(db)
+
 @pytest.mark.asyncio
 async def test_create_candidate():
     async with AsyncClient(app=app, base_url="http://test") as async_client:
@@ -99,6 +143,58 @@ async def test_get_candidate():
         )
     assert response.status_code == 200
 
+@pytest.mark.asyncio
+async def test_get_candidate_not_modified():
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        token = await get_access_token(async_client)
+        headers = {"Authorization": f"Bearer {token}"}
+        candidate_response = await async_client.post(
+            "/candidates",
+            json={
+                "name": generate_random_candidate_name(),
+                "experience": generate_random_experience(),
+                "skills": generate_random_skills(),
+            },
+            headers=headers,
+        )
+        candidate_id = candidate_response.json()["_id"]
+
+        response = await async_client.get(f"/candidates/{candidate_id}", headers=headers)
+        etag = response.headers["etag"]
+
+        response = await async_client.get(
+            f"/candidates/{candidate_id}", headers={**headers, "If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+@pytest.mark.asyncio
+async def test_get_candidates_by_ids():
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        token = await get_access_token(async_client)
+        headers = {"Authorization": f"Bearer {token}"}
+        candidate_ids = []
+        for _ in range(3):
+            candidate_response = await async_client.post(
+                "/candidates",
+                json={
+                    "name": generate_random_candidate_name(),
+                    "experience": generate_random_experience(),
+                    "skills": generate_random_skills(),
+                },
+                headers=headers,
+            )
+            candidate_ids.append(candidate_response.json()["_id"])
+
+        requested = list(reversed(candidate_ids))
+        response = await async_client.get(
+            "/candidates",
+            params={"ids": ",".join(str(id) for id in requested)},
+            headers=headers,
+        )
+    assert response.status_code == 200
+    assert [candidate["_id"] for candidate in response.json()] == requested
+
 @pytest.mark.asyncio
 async def test_update_candidate():
     async with AsyncClient(app=app, base_url="http://test") as async_client:
@@ -125,6 +221,55 @@ async def test_update_candidate():
         )
     assert response.status_code == 200
 
+@pytest.mark.asyncio
+async def test_update_candidate_if_match():
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        token = await get_access_token(async_client)
+        headers = {"Authorization": f"Bearer {token}"}
+        candidate_response = await async_client.post(
+            "/candidates",
+            json={
+                "name": generate_random_candidate_name(),
+                "experience": generate_random_experience(),
+                "skills": generate_random_skills(),
+            },
+            headers=headers,
+        )
+        candidate_id = candidate_response.json()["_id"]
+        etag = candidate_response.headers["etag"]
+        update = {
+            "name": generate_random_candidate_name(),
+            "experience": generate_random_experience(),
+            "skills": generate_random_skills(),
+        }
+
+        response = await async_client.put(
+            f"/candidates/{candidate_id}", json=update, headers={**headers, "If-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+
+        # The first update bumped the version, so the old ETag is stale
+        response = await async_client.put(
+            f"/candidates/{candidate_id}", json=update, headers={**headers, "If-Match": etag}
+        )
+    assert response.status_code == 412
+
+@pytest.mark.asyncio
+async def test_update_missing_candidate_if_match_any():
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        token = await get_access_token(async_client)
+        response = await async_client.put(
+            "/candidates/-1",
+            json={
+                "name": generate_random_candidate_name(),
+                "experience": generate_random_experience(),
+                "skills": generate_random_skills(),
+            },
+            headers={"Authorization": f"Bearer {token}", "If-Match": "*"},
+        )
+    assert response.status_code == 412
+
 @pytest.mark.asyncio
 async def test_delete_candidate():
     async with AsyncClient(app=app, base_url="http://test") as async_client:
@@ -155,3 +300,37 @@ async def test_generate_report():
         )
     assert response.status_code == 200
     assert "text/csv" in response.headers["content-type"]
+
+@pytest.mark.asyncio
+async def test_all_candidates_uses_indexes():
+    threshold_ms, explain_rate = profiler.threshold_ms, profiler.explain_rate
+    profiler.threshold_ms, profiler.explain_rate = 0, 1.0
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as async_client:
+            token = await get_access_token(async_client)
+            profiler.reset()
+            for params in ({}, {"search": "Python"}):
+                response = await async_client.get(
+                    "/all-candidates",
+                    params=params,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                assert response.status_code == 200
+        assert_no_collection_scans(profiler, "candidates")
+    finally:
+        profiler.threshold_ms, profiler.explain_rate = threshold_ms, explain_rate
+
+@pytest.mark.asyncio
+async def test_get_slow_queries():
+    email = generate_random_email()
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        token = await get_access_token(async_client, email)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = await async_client.get("/admin/slow-queries", headers=headers)
+        assert response.status_code == 403
+
+        with patch("app.auth.ADMIN_EMAILS", {email}):
+            response = await async_client.get("/admin/slow-queries", headers=headers)
+    assert response.status_code == 200
+    assert "queries" in response.json()
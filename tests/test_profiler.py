@@ -0,0 +1,87 @@
+import threading
+from types import SimpleNamespace
+
+from app.profiler import SlowQueryProfiler
+
+CONNECTION = ("localhost", 27017)
+
+
+def run_command(profiler, request_id, command, duration_ms, cursor_id=None):
+    """Feed a started and a succeeded event for one command to the profiler."""
+    command_name = next(iter(command))
+    profiler.started(
+        SimpleNamespace(
+            command_name=command_name,
+            command=command,
+            database_name="candidate_management",
+            connection_id=CONNECTION,
+            request_id=request_id,
+        )
+    )
+    profiler.succeeded(
+        SimpleNamespace(
+            command_name=command_name,
+            connection_id=CONNECTION,
+            request_id=request_id,
+            duration_micros=int(duration_ms * 1000),
+            reply={"cursor": {"id": cursor_id}} if cursor_id is not None else {},
+        )
+    )
+
+
+def test_get_more_batches_are_credited_to_the_find():
+    profiler = SlowQueryProfiler(threshold_ms=100, explain_rate=0)
+
+    run_command(
+        profiler, 1, {"find": "candidates", "filter": {"name": "Ada"}}, 40, cursor_id=7
+    )
+    run_command(
+        profiler, 2, {"getMore": 7, "collection": "candidates"}, 40, cursor_id=7
+    )
+    assert profiler.report() == []
+
+    run_command(
+        profiler, 3, {"getMore": 7, "collection": "candidates"}, 40, cursor_id=0
+    )
+    [entry] = profiler.report()
+    assert entry["command"] == "find"
+    assert entry["shape"] == {"name": "?"}
+    assert entry["batches"] == 3
+    assert entry["duration_ms"] == 120
+
+
+def test_killed_cursor_is_recorded():
+    profiler = SlowQueryProfiler(threshold_ms=100, explain_rate=0)
+
+    run_command(profiler, 1, {"find": "candidates", "filter": {}}, 150, cursor_id=7)
+    assert profiler.report() == []
+
+    run_command(profiler, 2, {"killCursors": "candidates", "cursors": [7]}, 1)
+    [entry] = profiler.report()
+    assert entry["batches"] == 1
+
+
+def test_reset_discards_running_explain():
+    profiler = SlowQueryProfiler(threshold_ms=0, explain_rate=1)
+    running, release = threading.Event(), threading.Event()
+
+    def explain(database_name, command):
+        running.set()
+        release.wait()
+        return {"explained": True, "collscan": True, "plan": None}
+
+    profiler._explain = explain
+    command = {"find": "candidates", "filter": {"name": "Ada"}}
+    run_command(profiler, 1, command, 1)
+    running.wait()
+
+    profiler.reset()
+    release.set()
+    profiler.wait()
+    assert profiler._plans == {}
+
+    # The shape can be explained again after the reset
+    run_command(profiler, 2, command, 1)
+    profiler.wait()
+    [entry] = profiler.report()
+    assert entry["collscan"]